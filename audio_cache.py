@@ -0,0 +1,148 @@
+"""
+Disk cache of decoded audio.
+
+Decoding a long video with ffmpeg is repeated every time a file is transcribed
+again with a different model, language or output format. The decoded 16 kHz
+float32 PCM is stored as a raw .npy file keyed by the source path, size and
+modification time, and memory-mapped on reuse so it is passed to the model
+without being read into a private copy. The least recently used entries are
+evicted once the cache exceeds its size cap.
+
+Pre-warm the cache for a batch from the command line:
+    python audio_cache.py warm video1.mp4 video2.mkv
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "stable-ts-gui", "audio")
+DEFAULT_CACHE_SIZE_MB = 10240
+
+
+def cache_path(file_path, cache_dir=DEFAULT_CACHE_DIR):
+    """Cache file for a source; a changed size or mtime gives a new entry."""
+    stat = os.stat(file_path)
+    key = f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return os.path.join(cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".npy")
+
+
+def load_cached_audio(file_path, cache_dir=DEFAULT_CACHE_DIR):
+    """Return the cached PCM memory-mapped, or None on a cache miss."""
+    import numpy as np
+
+    path = cache_path(file_path, cache_dir)
+    if not os.path.exists(path):
+        return None
+    # Touch the entry so eviction sees it as recently used
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    # Copy-on-write mapping: writable for torch.from_numpy, without reading the file into memory
+    return np.load(path, mmap_mode="c")
+
+
+def store_audio(file_path, audio, cache_dir=DEFAULT_CACHE_DIR, max_size_mb=DEFAULT_CACHE_SIZE_MB):
+    """Save decoded PCM for a source, then evict old entries above the size cap."""
+    import numpy as np
+
+    os.makedirs(cache_dir, exist_ok=True)
+    path = cache_path(file_path, cache_dir)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, audio)
+    os.replace(tmp_path, path)
+    evict(cache_dir, max_size_mb, keep=path)
+    return path
+
+
+def evict(cache_dir=DEFAULT_CACHE_DIR, max_size_mb=DEFAULT_CACHE_SIZE_MB, keep=None):
+    """Delete least recently used entries until the cache fits in max_size_mb."""
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith(".npy"):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    limit = max_size_mb * 1024 * 1024
+    for _, size, path in sorted(entries):
+        if total <= limit:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            # Still mapped by a worker on Windows; try again on the next store
+            pass
+
+
+def get_audio(file_path, cache_dir=DEFAULT_CACHE_DIR, max_size_mb=DEFAULT_CACHE_SIZE_MB):
+    """Return (PCM, cache hit) for a source, decoding and caching it on a miss."""
+    audio = load_cached_audio(file_path, cache_dir)
+    if audio is not None:
+        return audio, True
+
+    import whisper
+    audio = whisper.load_audio(file_path)
+    path = store_audio(file_path, audio, cache_dir, max_size_mb)
+    # Serve the mapped copy so a miss and a hit behave the same
+    return (load_cached_audio(file_path, cache_dir) if os.path.exists(path) else audio), False
+
+
+def warm_cache(files, cache_dir=DEFAULT_CACHE_DIR, max_size_mb=DEFAULT_CACHE_SIZE_MB, result_queue=None):
+    """Decode a batch of files into the cache ahead of transcription."""
+    def log(message):
+        if result_queue is not None:
+            result_queue.put(("log", message))
+        else:
+            print(message)
+
+    cached = 0
+    for index, file_path in enumerate(files):
+        filename = os.path.basename(file_path)
+        try:
+            if os.path.exists(cache_path(file_path, cache_dir)):
+                log(f"Cache {index + 1}/{len(files)}: {filename} already cached")
+            else:
+                get_audio(file_path, cache_dir, max_size_mb)
+                log(f"Cache {index + 1}/{len(files)}: decoded {filename}")
+            cached += 1
+        except Exception as e:
+            log(f"Cache {index + 1}/{len(files)}: error decoding {filename}: {str(e)}")
+
+    if result_queue is not None:
+        result_queue.put(("done", cached))
+    return cached
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the decoded-audio cache of Stable-TS GUI.")
+    parser.add_argument("command", choices=["warm", "evict"], help="warm: decode files into the cache; "
+                                                                   "evict: trim the cache to its size cap")
+    parser.add_argument("files", nargs="*", help="Media files to decode (for warm)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--max-size-mb", type=float, default=DEFAULT_CACHE_SIZE_MB)
+    args = parser.parse_args()
+
+    if args.command == "warm":
+        cached = warm_cache(args.files, args.cache_dir, args.max_size_mb)
+        print(f"{cached}/{len(args.files)} file(s) cached in {args.cache_dir}")
+        return cached == len(args.files)
+
+    if os.path.isdir(args.cache_dir):
+        evict(args.cache_dir, args.max_size_mb)
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
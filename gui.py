@@ -4,6 +4,9 @@ import tkinter as tk
 import os
 import json
 
+# Next to the application, where `install.py --calibrate` writes it, not the working directory
+SETTINGS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "settings.json")
+
 class App(customtkinter.CTk, TkinterDnD.DnDWrapper):
     def __init__(self):
         super().__init__()
@@ -99,6 +102,9 @@ class App(customtkinter.CTk, TkinterDnD.DnDWrapper):
         
         self.clear_btn = customtkinter.CTkButton(self.queue_header_frame, text="Clear Queue", width=80, height=24, fg_color="firebrick", command=self.clear_queue)
         self.clear_btn.pack(side="right")
+
+        self.prewarm_btn = customtkinter.CTkButton(self.queue_header_frame, text="Pre-warm Cache", width=110, height=24, command=self.prewarm_cache)
+        self.prewarm_btn.pack(side="right", padx=5)
         
         self.queue_frame = customtkinter.CTkScrollableFrame(self.middle_frame, label_text="Pending Files")
         self.queue_frame.grid(row=2, column=0, padx=10, pady=(0, 10), sticky="nsew")
@@ -191,12 +197,22 @@ class App(customtkinter.CTk, TkinterDnD.DnDWrapper):
         self.stop_button.configure(state="normal")
         self.log_to_terminal(f"Starting transcription with Model: {model}, Language: {language}, Format: {output_format}")
 
+        self.get_manager().start(self.file_list, model, language, output_format, app=self, options=self.settings)
+
+    def get_manager(self):
         # Initialize manager if not already done
         if not hasattr(self, 'manager'):
             from transcriber import TranscriptionManager
             self.manager = TranscriptionManager(self.update_from_thread, self.progress_update, self.file_progress_update)
+        return self.manager
 
-        self.manager.start(self.file_list, model, language, output_format, app=self)
+    def prewarm_cache(self):
+        if not self.file_list:
+            self.log_to_terminal("No files in queue.")
+            return
+        if not self.settings.get("audio_cache", False):
+            self.log_to_terminal("Note: set \"audio_cache\": true in settings.json for transcription to use the cache.")
+        self.get_manager().prewarm_cache(self.file_list, app=self, options=self.settings)
 
     def update_from_thread(self, message):
         self.after(0, self.log_to_terminal, message)
@@ -247,21 +263,23 @@ class App(customtkinter.CTk, TkinterDnD.DnDWrapper):
 
     def load_settings(self):
         try:
-            if os.path.exists("settings.json"):
-                with open("settings.json", "r") as f:
+            if os.path.exists(SETTINGS_FILE):
+                with open(SETTINGS_FILE, "r") as f:
                     return json.load(f)
         except Exception as e:
             print(f"Error loading settings: {e}")
         return {}
 
     def save_settings(self):
-        settings = {
+        # Keep performance keys (workers, memory budget, ...) that have no widget
+        settings = dict(self.settings)
+        settings.update({
             "model": self.model_var.get(),
             "language": self.lang_var.get(),
             "format": self.format_var.get()
-        }
+        })
         try:
-            with open("settings.json", "w") as f:
+            with open(SETTINGS_FILE, "w") as f:
                 json.dump(settings, f)
         except Exception as e:
             self.log_to_terminal(f"Error saving settings: {e}")
@@ -8,6 +8,9 @@ import subprocess
 import sys
 import os
 import shutil
+import json
+import time
+import multiprocessing
 
 # Required packages and their pip names
 REQUIRED_PACKAGES = [
@@ -20,6 +23,19 @@ REQUIRED_PACKAGES = [
 PYTORCH_CUDA_COMMAND = "pip install torch torchvision torchaudio --index-url https://download.pytorch.org/whl/cu121"
 PYTORCH_CPU_COMMAND = "pip install torch torchvision torchaudio"
 
+# Calibration: models timed on the synthetic clip and the clip length in seconds
+CALIBRATION_MODELS = ["tiny", "base"]
+CALIBRATION_SECONDS = 30
+SAMPLE_RATE = 16000
+
+# Share of the available memory the calibrated worker pool may use
+CALIBRATION_MEMORY_FRACTION = 0.8
+
+# Seconds each calibration phase (model loading, timed run) may take
+CALIBRATION_TIMEOUT = 600
+
+SETTINGS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "settings.json")
+
 
 def print_header(text):
     print("\n" + "=" * 60)
@@ -230,6 +246,229 @@ def check_stable_whisper():
         return False
 
 
+def make_synthetic_clip(seconds=CALIBRATION_SECONDS, seed=0):
+    """
+    Deterministic speech-like test signal: a gliding voiced tone with harmonics,
+    gated at syllable rate, plus a little noise. Only used for timing.
+    """
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    pitch = 120 + 30 * np.sin(2 * np.pi * 0.3 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 12))
+    syllables = np.clip(np.sin(2 * np.pi * 4 * t), 0, None) * (np.sin(2 * np.pi * 0.25 * t) > -0.5)
+    audio = 0.1 * voiced * syllables + 0.005 * rng.standard_normal(len(t))
+    return audio.astype(np.float32)
+
+
+def peak_memory_mb():
+    """Peak resident memory of the current process in MB, or None if unknown."""
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        peak = getattr(info, "peak_wset", None)  # Windows only
+        if peak is not None:
+            return peak / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        return None
+
+
+def calibration_worker(model_name, threads, quantize, start_event, result_queue):
+    """Time one transcription of the synthetic clip in a separate process."""
+    try:
+        import torch
+        import stable_whisper
+        torch.set_num_threads(threads)
+        model = stable_whisper.load_model(model_name, dq=quantize)
+        audio = make_synthetic_clip()
+        # Warm up kernels so the timed run measures steady-state speed
+        model.transcribe(audio[:5 * SAMPLE_RATE], temperature=0.0, verbose=None)
+
+        result_queue.put(("ready", None))
+        start_event.wait()
+        start = time.time()
+        model.transcribe(audio, temperature=0.0, verbose=None)
+        result_queue.put(("result", (time.time() - start, peak_memory_mb())))
+    except Exception as e:
+        result_queue.put(("error", str(e)))
+
+
+def collect_calibration_messages(processes, result_queue, count):
+    """
+    Read `count` messages from calibration workers. Fails as soon as a worker
+    reports an error or dies (e.g. killed for running out of memory).
+    """
+    messages = []
+    deadline = time.time() + CALIBRATION_TIMEOUT
+    while True:
+        while len(messages) < count and not result_queue.empty():
+            msg_type, msg_data = result_queue.get()
+            if msg_type == "error":
+                raise RuntimeError(msg_data)
+            messages.append(msg_data)
+        if len(messages) >= count:
+            return messages
+        # A worker that reported its result exits with code 0
+        crashed = [p for p in processes if p.exitcode not in (None, 0)]
+        if crashed:
+            raise RuntimeError(f"worker exited with code {crashed[0].exitcode}")
+        if time.time() > deadline:
+            raise RuntimeError(f"timed out after {CALIBRATION_TIMEOUT}s")
+        time.sleep(0.1)
+
+
+def run_calibration_config(model_name, workers, threads, quantize):
+    """
+    Transcribe the clip in `workers` processes at once.
+    Returns (throughput in audio seconds per second, worst real-time factor, peak MB per worker).
+    """
+    # The installer has already used torch (and possibly CUDA), which is not safe in a forked child
+    context = multiprocessing.get_context("spawn")
+    result_queue = context.SimpleQueue()
+    start_event = context.Event()
+    processes = [context.Process(target=calibration_worker,
+                                 args=(model_name, threads, quantize, start_event, result_queue))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+
+    try:
+        # Start the timed runs together, after every worker has loaded its model
+        collect_calibration_messages(processes, result_queue, workers)
+        start_event.set()
+        results = collect_calibration_messages(processes, result_queue, workers)
+    except BaseException:
+        # The other workers may be waiting for the start or still transcribing
+        for process in processes:
+            if process.is_alive():
+                process.kill()
+        raise
+    finally:
+        for process in processes:
+            process.join(timeout=60)
+            if process.is_alive():
+                process.kill()
+
+    elapsed = [seconds for seconds, _ in results]
+    peaks = [peak or 0 for _, peak in results]
+    rtf = max(elapsed) / CALIBRATION_SECONDS
+    return workers * CALIBRATION_SECONDS / max(elapsed), rtf, max(peaks)
+
+
+def calibration_configs(cpu_count, quantize_options):
+    """
+    (workers, threads, quantize) combinations that keep every core busy, fewest
+    workers first so the memory of a worker is known before larger pools run.
+    Only thread counts that divide the core count leave no core idle.
+    """
+    configs = []
+    for threads in range(cpu_count, 0, -1):
+        if cpu_count % threads == 0:
+            configs.extend((cpu_count // threads, threads, quantize) for quantize in quantize_options)
+    return configs
+
+
+def load_settings_file():
+    try:
+        if os.path.exists(SETTINGS_FILE):
+            with open(SETTINGS_FILE, "r") as f:
+                return json.load(f)
+    except Exception as e:
+        print(f"  Error loading settings: {e}")
+    return {}
+
+
+def calibrate():
+    """Measure transcription speed on this machine and write the best parallelism to settings.json."""
+    print_header("Calibrating Performance")
+    try:
+        import torch
+        import stable_whisper
+        import numpy
+    except ImportError as e:
+        print_status("Calibration", False, f"Missing dependency: {e}")
+        return False
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from transcriber import get_available_memory_mb
+
+    cpu_count = os.cpu_count() or 1
+    available = get_available_memory_mb()
+    memory_budget = available * CALIBRATION_MEMORY_FRACTION if available else None
+    # Dynamic quantization is CPU-only; with CUDA the GPU does the work anyway
+    quantize_options = [False] if torch.cuda.is_available() else [False, True]
+    configs = calibration_configs(cpu_count, quantize_options)
+    if torch.cuda.is_available():
+        # Memory admission control only budgets host RAM: more workers would load
+        # more copies of the model onto the one GPU, which large models do not fit
+        configs = [config for config in configs if config[0] == 1]
+    print(f"  {cpu_count} CPU cores, {len(configs)} configurations x {len(CALIBRATION_MODELS)} models.")
+    print("  This transcribes a synthetic clip repeatedly and can take several minutes.\n")
+
+    best = {}
+    results = []
+    peak_per_worker = {}  # (model, quantize) -> highest peak MB measured so far
+    for model_name in CALIBRATION_MODELS:
+        for workers, threads, quantize in configs:
+            label = f"{model_name:5s} workers={workers:<3d} threads={threads:<3d} int8={'yes' if quantize else 'no '}"
+            print(f"    {label} ...", end=" ", flush=True)
+            known_peak = peak_per_worker.get((model_name, quantize))
+            if memory_budget is not None and known_peak and workers * known_peak > memory_budget:
+                print(f"skipped (needs ~{workers * known_peak:.0f} MB)")
+                continue
+            try:
+                throughput, rtf, peak_mb = run_calibration_config(model_name, workers, threads, quantize)
+            except Exception as e:
+                print(f"FAILED ({e})")
+                continue
+            peak_per_worker[(model_name, quantize)] = max(peak_mb, known_peak or 0)
+            fits = memory_budget is None or workers * peak_mb <= memory_budget
+            print(f"{throughput:6.1f}x real-time, RTF {rtf:.2f}, {peak_mb:.0f} MB/worker"
+                  + ("" if fits else " (exceeds memory)"))
+            results.append({"model": model_name, "workers": workers, "threads": threads, "quantize": quantize,
+                            "throughput": round(throughput, 2), "rtf": round(rtf, 3), "peak_mb": round(peak_mb)})
+            if fits and throughput > best.get(model_name, {}).get("throughput", 0):
+                best[model_name] = results[-1]
+
+    if not best:
+        print_status("Calibration", False, "No configuration completed")
+        return False
+
+    # The larger calibration model is closer to what is used for real work
+    chosen = next(best[name] for name in reversed(CALIBRATION_MODELS) if name in best)
+    settings = load_settings_file()
+    # The thread budget is split over however many workers the memory allows
+    # for the model actually used, so store the total rather than per worker
+    settings.pop("threads", None)
+    settings.update({
+        "workers": chosen["workers"],
+        "cpu_threads": chosen["workers"] * chosen["threads"],
+        "quantize": chosen["quantize"],
+        "calibration": {"date": time.strftime("%Y-%m-%d %H:%M"), "cpu_count": cpu_count,
+                        "chosen": chosen, "results": results},
+    })
+    try:
+        with open(SETTINGS_FILE, "w") as f:
+            json.dump(settings, f, indent=2)
+    except Exception as e:
+        print_status("Calibration", False, f"Error saving settings: {e}")
+        return False
+
+    print_status("Calibration", True, f"workers={chosen['workers']}, threads={chosen['threads']}, "
+                                      f"int8={chosen['quantize']} ({chosen['throughput']}x real-time "
+                                      f"with {chosen['model']})")
+    print(f"  Saved to {SETTINGS_FILE}")
+    return True
+
+
 def main():
     print("\n" + "=" * 60)
     print("       STABLE-TS GUI INSTALLER")
@@ -265,6 +504,11 @@ def main():
     
     if all_ok:
         print("  All dependencies are installed correctly!")
+        response = input("\n  Calibrate performance for this machine now? (takes a few minutes) [y/N]: ").strip().lower()
+        if response == 'y':
+            calibrate()
+        else:
+            print("  You can calibrate later with: python install.py --calibrate")
         print("\n  To launch the application, run:")
         print("    python main.py")
         print()
@@ -278,7 +522,7 @@ def main():
 
 if __name__ == "__main__":
     try:
-        success = main()
+        success = calibrate() if "--calibrate" in sys.argv[1:] else main()
         sys.exit(0 if success else 1)
     except KeyboardInterrupt:
         print("\n\nInstallation cancelled.")
@@ -0,0 +1,101 @@
+"""
+Shared model weights for CPU worker processes.
+
+The fp32 weights of a model are exported once to a torch file and every worker
+memory-maps that file instead of holding a private copy. The mapped pages are
+read-only, so the OS shares them between all workers through the page cache and
+each additional worker only adds its activation memory.
+"""
+
+import dataclasses
+import gc
+import os
+
+# Exported weights are kept between runs; large models take ~6 GB of disk in fp32
+SHARED_WEIGHTS_DIR = os.path.join(os.path.expanduser("~"), ".cache", "stable-ts-gui", "weights")
+
+
+def shared_weights_path(model_name):
+    """Path of the exported, memory-mappable weights for a model."""
+    return os.path.join(SHARED_WEIGHTS_DIR, f"{model_name}.pt")
+
+
+def export_shared_weights(model, path):
+    """Save a loaded CPU model in a format that can be memory-mapped by other processes."""
+    import torch
+
+    persistent = model.state_dict()
+    # Non-persistent buffers (attention mask, alignment heads) are not in the
+    # state dict; store them too so loading never has to initialize the model
+    buffers = {}
+    sparse = []
+    for name, buffer in model.named_buffers():
+        if name in persistent:
+            continue
+        if buffer.is_sparse:
+            buffer = buffer.to_dense()
+            sparse.append(name)
+        buffers[name] = buffer
+
+    checkpoint = {
+        "dims": dataclasses.asdict(model.dims),
+        "state_dict": persistent,
+        "buffers": buffers,
+        "sparse": sparse,
+    }
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    torch.save(checkpoint, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_shared_weights(path):
+    """Build a stable-ts model whose weights are memory-mapped from an exported file."""
+    import torch
+    import stable_whisper
+    from whisper.model import ModelDimensions, Whisper
+
+    checkpoint = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+
+    # Build on the meta device so no private weights are allocated, then
+    # adopt the mapped tensors as parameters without copying them
+    with torch.device("meta"):
+        model = Whisper(ModelDimensions(**checkpoint["dims"]))
+    model.load_state_dict(checkpoint["state_dict"], assign=True)
+    for name, buffer in checkpoint["buffers"].items():
+        module_name, _, buffer_name = name.rpartition(".")
+        module = model.get_submodule(module_name)
+        if name in checkpoint["sparse"]:
+            buffer = buffer.to_sparse()
+        module.register_buffer(buffer_name, buffer, persistent=False)
+
+    model.eval()
+    stable_whisper.modify_model(model)
+    return model
+
+
+def load_model_shared(model_name):
+    """
+    Load a model for a worker, sharing the weights with other workers when running on CPU.
+    Returns (model, shared). On CUDA the weights live in GPU memory and are loaded normally.
+    """
+    import torch
+    import stable_whisper
+
+    if torch.cuda.is_available():
+        return stable_whisper.load_model(model_name), False
+
+    path = shared_weights_path(model_name)
+    if not os.path.exists(path):
+        # First use: load privately once, export, then drop the private copy
+        model = stable_whisper.load_model(model_name, device="cpu")
+        export_shared_weights(model, path)
+        del model
+        gc.collect()
+
+    try:
+        return load_shared_weights(path), True
+    except (TypeError, AttributeError):
+        # torch < 2.1 has no mmap / assign loading
+        return stable_whisper.load_model(model_name), False
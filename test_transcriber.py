@@ -0,0 +1,214 @@
+"""
+Drives TranscriptionManager end to end with stub stable-ts/whisper modules and a
+stub ffprobe, so worker crashes, hangs and retries can be checked without models.
+Run with: python -m pytest test_transcriber.py
+"""
+
+import os
+import stat
+import sys
+import tempfile
+import time
+
+STUB_STABLE_WHISPER = '''
+import os, signal, time
+
+class Segment:
+    has_words = False
+
+class Result:
+    segments = [Segment()]
+    def to_srt_vtt(self, path, vtt=True, word_level=True):
+        open(path, "w").write("WEBVTT\\n" if vtt else "1\\n")
+    def to_txt(self, path):
+        open(path, "w").write("text")
+    def save_as_json(self, path):
+        open(path, "w").write("{}")
+
+class Model:
+    def __init__(self, name):
+        self.name = name
+
+    def transcribe(self, audio, progress_callback=None, **kwargs):
+        name = os.path.basename(str(audio))
+        if name.startswith("tiny_only") and self.name != "tiny":
+            raise ValueError("only the tiny model can transcribe this")
+        if name.startswith("crash"):
+            os.kill(os.getpid(), signal.SIGKILL)
+        if name.startswith("hang"):
+            time.sleep(600)
+        if progress_callback:
+            progress_callback(1, 1)
+        return Result()
+
+    def align(self, audio, text, language, progress_callback=None, failure_threshold=None):
+        if os.path.basename(str(audio)).startswith("misaligned"):
+            raise RuntimeError("cannot align")
+        return Result()
+
+def load_model(name, **kwargs):
+    # The first load fails, like a CUDA out-of-memory error with several workers on one GPU
+    marker = os.environ.get("STUB_FAIL_FIRST_LOAD")
+    if marker and not os.path.exists(marker):
+        open(marker, "w").close()
+        raise RuntimeError("CUDA out of memory")
+    return Model(name)
+'''
+
+STUB_WHISPER = '''
+def load_audio(path):
+    # Stands in for the decoded array; the stub model only looks at the name
+    return path
+'''
+
+STUB_FFPROBE = '''#!/bin/sh
+echo 1.0
+'''
+
+
+def make_stub_environment(root):
+    """Put the stub modules on the import path and the stub ffprobe on PATH."""
+    with open(os.path.join(root, "stable_whisper.py"), "w") as f:
+        f.write(STUB_STABLE_WHISPER)
+    with open(os.path.join(root, "whisper.py"), "w") as f:
+        f.write(STUB_WHISPER)
+    ffprobe = os.path.join(root, "ffprobe")
+    with open(ffprobe, "w") as f:
+        f.write(STUB_FFPROBE)
+    os.chmod(ffprobe, os.stat(ffprobe).st_mode | stat.S_IEXEC)
+
+    sys.path.insert(0, root)
+    os.environ["PYTHONPATH"] = os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")]))
+    os.environ["PATH"] = os.pathsep.join([root, os.environ.get("PATH", "")])
+
+
+class FakeApp:
+    """Runs the manager's `after` callbacks in a plain loop instead of a Tk mainloop."""
+
+    def __init__(self):
+        self.jobs = []
+
+    def after(self, ms, callback, *args):
+        self.jobs.append((callback, args))
+        return len(self.jobs)
+
+    def after_cancel(self, job):
+        pass
+
+    def run(self, timeout):
+        deadline = time.time() + timeout
+        while self.jobs and time.time() < deadline:
+            callback, args = self.jobs.pop(0)
+            time.sleep(0.05)
+            callback(*args)
+
+
+def run_batch(names, timeout=60, model="tiny", output_format="vtt", sidecars=None, **options):
+    """Transcribe empty stub media files and return (manager, log lines, media dir)."""
+    import transcriber
+
+    media_dir = tempfile.mkdtemp()
+    for name, text in (sidecars or {}).items():
+        with open(os.path.join(media_dir, name), "w") as f:
+            f.write(text)
+    files = []
+    for name in names:
+        path = os.path.join(media_dir, name)
+        open(path, "w").close()
+        files.append(path)
+
+    log = []
+    app = FakeApp()
+    manager = transcriber.TranscriptionManager(log.append, lambda done, total: None)
+    manager.start(files, model, "en", output_format, app=app, options=options)
+    app.run(timeout)
+    if manager.is_running:
+        manager.stop()
+    return manager, log, media_dir
+
+
+def setup_module(module):
+    root = tempfile.mkdtemp()
+    make_stub_environment(root)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    import transcriber
+    transcriber.REQUEUE_BACKOFF_SECONDS = 0.2
+    transcriber.QUARANTINE_FILE = os.path.join(root, "quarantine.json")
+
+
+def test_srt_sidecar_keeps_numeric_cue_text():
+    import transcriber
+
+    path = os.path.join(tempfile.mkdtemp(), "video.srt")
+    with open(path, "w") as f:
+        f.write("1\n00:00:01,000 --> 00:00:02,000\n42\n\n2\n00:00:03,000 --> 00:00:04,000\nHello\nthere\n")
+    assert transcriber.read_transcript_sidecar(path) == "42\nHello there"
+
+
+def test_batch_completes():
+    for prefetch in (0, 1):
+        manager, log, media_dir = run_batch(["a.mp4", "b.mp4", "c.mp4"], workers=2, prefetch=prefetch)
+        assert not manager.is_running
+        assert "All tasks finished." in log
+        assert sorted(os.listdir(media_dir)) == ["a.mp4", "a.vtt", "b.mp4", "b.vtt", "c.mp4", "c.vtt"]
+
+
+def test_worker_start_failure_is_not_fatal():
+    marker = os.path.join(tempfile.mkdtemp(), "failed")
+    os.environ["STUB_FAIL_FIRST_LOAD"] = marker
+    try:
+        manager, log, media_dir = run_batch(["a.mp4", "b.mp4", "c.mp4"], workers=2)
+    finally:
+        del os.environ["STUB_FAIL_FIRST_LOAD"]
+    assert any("failed: CUDA out of memory" in line for line in log)
+    assert "All tasks finished." in log, "\n".join(log)
+    assert manager.completed == 3
+    assert len([name for name in os.listdir(media_dir) if name.endswith(".vtt")]) == 3
+
+
+def test_fallback_model_replaces_primary_for_one_file():
+    manager, log, media_dir = run_batch(["tiny_only.mp4", "b.mp4"], model="base", workers=1)
+    assert "All tasks finished." in log, "\n".join(log)
+    assert "Loading fallback model 'tiny'..." in log
+    # The primary model was dropped for the retry and comes back for the next file
+    assert "Reloading model 'base'..." in log
+    assert sorted(name for name in os.listdir(media_dir) if name.endswith(".vtt")) == ["b.vtt", "tiny_only.vtt"]
+
+
+def test_sidecar_named_like_output_is_aligned_not_transcribed_over():
+    captions = "1\n00:00:01,000 --> 00:00:02,000\nrough captions\n"
+    manager, log, media_dir = run_batch(["a.mp4", "misaligned.mp4"], output_format="srt", align_sidecars=True,
+                                        sidecars={"a.srt": captions, "misaligned.srt": captions})
+    assert "All tasks finished." in log, "\n".join(log)
+    assert any(line.startswith("Aligning a.mp4 to a.srt") for line in log)
+    assert open(os.path.join(media_dir, "a.srt")).read() == "1\n"
+    # A failed alignment must not fall back to a transcription over the user's file
+    assert open(os.path.join(media_dir, "misaligned.srt")).read() == captions
+    assert not any("transcribing instead" in line for line in log)
+
+
+def test_queued_retry_survives_last_worker_dying():
+    # The crashed file's backoff ends while the only worker is on the last attempt
+    # of the hanging file, so it is dispatched to the shared queue with nothing left
+    # pending; once the watchdog gives up on the hang the queued job must still run
+    import transcriber
+
+    backoff = transcriber.REQUEUE_BACKOFF_SECONDS
+    transcriber.REQUEUE_BACKOFF_SECONDS = 7.5
+    try:
+        manager, log, _ = run_batch(["crash.mp4", "hang.mp4"], workers=1, prefetch=0,
+                                    timeout_base=3, timeout_factor=0)
+    finally:
+        transcriber.REQUEUE_BACKOFF_SECONDS = backoff
+    assert not manager.is_running, "\n".join(log)
+    assert "All tasks finished." in log
+    assert manager.completed == 2
+
+
+if __name__ == "__main__":
+    setup_module(sys.modules[__name__])
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"{name}: ok")
@@ -3,76 +3,813 @@ import os
 import sys
 import queue
 import time
+import collections
+import contextlib
+import io
+import re
+import json
+import subprocess
+import functools
+import gc
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import wait as wait_connections
 
-def transcription_worker(file_queue, result_queue, model_name, language, output_format):
+from shared_weights import shared_weights_path
+from audio_cache import DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE_MB, warm_cache
+
+# Approximate resident memory (MB) of a worker with the model loaded, including
+# torch runtime overhead. Used until real RSS measurements are available.
+MODEL_MEMORY_MB = {
+    "tiny": 500,
+    "base": 700,
+    "small": 1400,
+    "medium": 3300,
+    "large": 6400,
+    "large-v2": 6400,
+    "large-v3": 6400,
+}
+
+# Torch runtime memory (MB) every worker process needs besides the weights
+WORKER_OVERHEAD_MB = 300
+
+# Working memory (MB) for one file being decoded or transcribed in a worker
+FILE_MEMORY_MB = 400
+
+# Share of the currently available memory used when no budget is configured
+DEFAULT_MEMORY_FRACTION = 0.8
+
+# How often (seconds) worker RSS is sampled while polling
+RSS_SAMPLE_INTERVAL = 1.0
+
+# Failed files are retried this many times in total before being reported as failed
+MAX_FILE_ATTEMPTS = 3
+REQUEUE_BACKOFF_SECONDS = 5
+
+# Watchdog: a file may run for FILE_TIMEOUT_BASE + FILE_TIMEOUT_FACTOR * its duration
+# before its worker is killed (overridable with "timeout_base" / "timeout_factor")
+FILE_TIMEOUT_BASE = 300
+FILE_TIMEOUT_FACTOR = 5.0
+# Used while the duration of a file is unknown
+FILE_TIMEOUT_UNKNOWN = 3600
+
+# Smaller model used for the last retry of a failing file
+FALLBACK_MODELS = {
+    "large-v3": "medium",
+    "large-v2": "medium",
+    "large": "medium",
+    "medium": "small",
+    "small": "base",
+    "base": "tiny",
+}
+
+# Files that exhausted their retries; they are skipped in later batches. Kept next
+# to the application like settings.json, whatever directory the GUI is started from.
+QUARANTINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "quarantine.json")
+
+# Transcripts next to the media that switch a file to alignment-only mode
+SIDECAR_EXTENSIONS = (".txt", ".srt")
+# Alignment gives up (and the file is transcribed instead) when more than this
+# share of the transcript's words cannot be placed in the audio
+ALIGN_FAILURE_THRESHOLD = 0.2
+
+SAMPLE_RATE = 16000
+
+# Short-clip mode: clips up to one Whisper window are decoded together in a batch
+SHORT_CLIP_SECONDS = 30
+# Decoded PCM (MB) of one clip held in a worker's batch
+CLIP_MEMORY_MB = SHORT_CLIP_SECONDS * SAMPLE_RATE * 4 / (1024 * 1024)
+
+# Longest file decoded ahead by prefetch: whisper.load_audio holds the int16 ffmpeg
+# output and the float32 copy at once, which must fit in FILE_MEMORY_MB. Longer
+# files are passed as a path so stable-ts decodes them in chunks.
+PREFETCH_MAX_SECONDS = FILE_MEMORY_MB * 1024 * 1024 / (SAMPLE_RATE * 6)
+# Seconds a worker waits for more queued clips before running a partial batch
+CLIP_BATCH_WAIT = 0.2
+# Whisper's own thresholds; a batched clip that misses them is transcribed alone
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+# Seconds per Whisper timestamp token
+TIMESTAMP_PRECISION = 0.02
+
+# Rough CPU transcription time per second of audio, used to report the speedup
+# of alignment until this worker has measured its own transcriptions
+TRANSCRIBE_RTF_ESTIMATE = {
+    "tiny": 0.1,
+    "base": 0.15,
+    "small": 0.35,
+    "medium": 0.8,
+    "large": 1.5,
+    "large-v2": 1.5,
+    "large-v3": 1.5,
+}
+
+
+def get_available_memory_mb():
+    """Return the memory available to new processes in MB, or None if unknown."""
+    try:
+        import psutil
+        return psutil.virtual_memory().available / (1024 * 1024)
+    except ImportError:
+        pass
+
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def is_out_of_memory(error):
+    """True for host memory errors and for CUDA running out of device memory."""
+    if isinstance(error, MemoryError):
+        return True
+    # Only check for the CUDA error if torch is already loaded
+    torch = sys.modules.get("torch")
+    cuda_oom = getattr(getattr(torch, "cuda", None), "OutOfMemoryError", None)
+    return cuda_oom is not None and isinstance(error, cuda_oom)
+
+
+def get_process_rss_mb(pid, proportional=False):
+    """
+    Return the resident set size of a process in MB, or None if unknown.
+    With `proportional`, pages shared with other processes (e.g. mapped model
+    weights) are split between them (PSS) where the platform reports it.
+    """
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            if proportional:
+                pss = getattr(process.memory_full_info(), "pss", None)
+                if pss is not None:
+                    return pss / (1024 * 1024)
+            return process.memory_info().rss / (1024 * 1024)
+        except Exception:
+            return None
+
+    sources = [(f"/proc/{pid}/smaps_rollup", "Pss:")] if proportional else []
+    sources.append((f"/proc/{pid}/status", "VmRSS:"))
+    for path, field in sources:
+        try:
+            with open(path, "r") as f:
+                for line in f:
+                    if line.startswith(field):
+                        return int(line.split()[1]) / 1024
+        except (OSError, ValueError):
+            pass
+    return None
+
+
+def estimate_worker_memory_mb(model_name, share_weights=False):
+    """
+    Estimated memory of one worker transcribing a single file with the given model.
+    Returns (per-worker MB, MB shared once by all workers).
+    """
+    model_mb = MODEL_MEMORY_MB.get(model_name, max(MODEL_MEMORY_MB.values()))
+    if share_weights:
+        return WORKER_OVERHEAD_MB + FILE_MEMORY_MB, model_mb - WORKER_OVERHEAD_MB
+    return model_mb + FILE_MEMORY_MB, 0
+
+
+def plan_parallelism(worker_mb, requested_workers, requested_prefetch, memory_budget_mb, shared_mb=0,
+                     clip_batch=0):
+    """
+    Fit the number of workers and the decode prefetch depth into a memory budget.
+    Prefetch is reduced first since it only hides decoding latency, then workers.
+    At least one worker is always allowed so the batch can make progress.
+    With clip batching every worker may also hold `clip_batch` decoded clips.
+    """
+    workers = max(1, requested_workers)
+    prefetch = max(0, requested_prefetch)
+    if memory_budget_mb is None:
+        return workers, prefetch
+
+    batch_mb = clip_batch * CLIP_MEMORY_MB if clip_batch > 1 else 0
+
+    def required(w, p):
+        return shared_mb + w * (worker_mb + batch_mb + p * FILE_MEMORY_MB)
+
+    while prefetch > 0 and required(workers, prefetch) > memory_budget_mb:
+        prefetch -= 1
+    while workers > 1 and required(workers, prefetch) > memory_budget_mb:
+        workers -= 1
+    return workers, prefetch
+
+
+# Minimum seconds between rewrites of a streaming partial output
+STREAM_FLUSH_INTERVAL = 1.0
+
+# Segment lines printed by stable-ts in verbose mode: [00:01.000 --> 00:04.500] "text"
+SEGMENT_LINE_RE = re.compile(r'^\[((?:\d+:)?\d+:\d+\.\d+) --> ((?:\d+:)?\d+:\d+\.\d+)\] "(.*)"$')
+
+
+def parse_timestamp(text):
+    """Convert a stable-ts display timestamp ([HH:]MM:SS.mmm) to seconds."""
+    seconds = 0.0
+    for part in text.split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def format_cue_timestamp(seconds, decimal_marker="."):
+    milliseconds = round(seconds * 1000)
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    secs, milliseconds = divmod(milliseconds, 1_000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{decimal_marker}{milliseconds:03d}"
+
+
+def partial_output_path(file_path, output_format):
+    """Sidecar that receives finalized segments while a file is still transcribing."""
+    # JSON cannot be appended to meaningfully, so it streams plain text
+    stream_format = "txt" if output_format == "json" else output_format
+    return f"{os.path.splitext(file_path)[0]}.partial.{stream_format}"
+
+
+def write_atomic(path, text):
+    """Replace a file in one step so readers never see a partially written file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+class SegmentStreamWriter(io.TextIOBase):
+    """
+    Stand-in for stdout while stable-ts runs with verbose=True. Each finalized
+    segment it prints is parsed and the partial output is rewritten atomically.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.format = os.path.splitext(path)[1][1:]
+        self.cues = []
+        self.buffer = ""
+        self.last_flush = 0
+        self.dirty = False
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        self.buffer += text
+        *lines, self.buffer = self.buffer.split("\n")
+        for line in lines:
+            match = SEGMENT_LINE_RE.match(line.strip())
+            if match:
+                start, end, segment_text = match.groups()
+                self.cues.append((parse_timestamp(start), parse_timestamp(end), segment_text.strip()))
+                self.dirty = True
+        if self.dirty and time.time() - self.last_flush >= STREAM_FLUSH_INTERVAL:
+            self.flush_cues()
+        return len(text)
+
+    def render(self):
+        if self.format == "txt":
+            return "".join(f"{text}\n" for _, _, text in self.cues)
+        if self.format == "vtt":
+            blocks = [f"{format_cue_timestamp(start)} --> {format_cue_timestamp(end)}\n{text}\n"
+                      for start, end, text in self.cues]
+            return "WEBVTT\n\n" + "\n".join(blocks)
+        blocks = [f"{i}\n{format_cue_timestamp(start, ',')} --> {format_cue_timestamp(end, ',')}\n{text}\n"
+                  for i, (start, end, text) in enumerate(self.cues, start=1)]
+        return "\n".join(blocks)
+
+    def flush_cues(self):
+        if self.dirty:
+            write_atomic(self.path, self.render())
+            self.dirty = False
+        self.last_flush = time.time()
+
+
+def save_result(result, output_file, output_format):
+    """Write a stable-ts result in the requested output format."""
+    # Retries and batched clips may only have segment-level timestamps
+    word_level = any(segment.has_words for segment in result.segments)
+    if output_format == "vtt":
+        result.to_srt_vtt(output_file, vtt=True, word_level=word_level)
+    elif output_format == "srt":
+        result.to_srt_vtt(output_file, vtt=False, word_level=word_level)
+    elif output_format == "txt":
+        result.to_txt(output_file)
+    elif output_format == "json":
+        result.save_as_json(output_file)
+
+
+def decode_audio(file_path, cache_dir=None, cache_size_mb=DEFAULT_CACHE_SIZE_MB):
+    """Decode a media file to 16 kHz mono float32 PCM, through the disk cache when given."""
+    if cache_dir:
+        from audio_cache import get_audio
+        return get_audio(file_path, cache_dir, cache_size_mb)[0]
+    import whisper
+    return whisper.load_audio(file_path)
+
+
+def probe_duration(file_path):
+    """Return the media duration in seconds using ffprobe, or None if unknown."""
+    try:
+        output = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+             "-of", "default=noprint_wrappers=1:nokey=1", file_path],
+            capture_output=True, text=True, timeout=30
+        ).stdout
+        return float(output.strip())
+    except (subprocess.TimeoutExpired, OSError, ValueError):
+        return None
+
+
+def fallback_options(model_name, failures):
+    """
+    Transcription overrides for a retry after `failures` failed attempts:
+    first word timestamps are disabled, then a smaller model is used as well.
+    """
+    options = {}
+    if failures >= 1:
+        options["word_timestamps"] = False
+    if failures >= 2 and model_name in FALLBACK_MODELS:
+        options["model"] = FALLBACK_MODELS[model_name]
+    return options
+
+
+def quarantine_key(file_path):
+    """Quarantine entry for a source; a changed size or mtime gives a new entry."""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return os.path.abspath(file_path)
+    return f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+
+
+def load_quarantine(log=print):
+    try:
+        if os.path.exists(QUARANTINE_FILE):
+            with open(QUARANTINE_FILE, "r") as f:
+                return json.load(f)
+    except Exception as e:
+        log(f"Error loading quarantine: {e}")
+    return {}
+
+
+def save_quarantine(quarantine, log=print):
+    try:
+        with open(QUARANTINE_FILE, "w") as f:
+            json.dump(quarantine, f, indent=2)
+    except Exception as e:
+        log(f"Error saving quarantine: {e}")
+
+
+def find_transcript_sidecar(file_path, output_file):
+    """
+    Return an existing .txt/.srt transcript next to the media. One that is not
+    also the output file is preferred, so the user's transcript is not replaced.
+    """
+    base_name = os.path.splitext(file_path)[0]
+    candidates = [base_name + extension for extension in SIDECAR_EXTENSIONS]
+    candidates.sort(key=lambda candidate: os.path.abspath(candidate) == os.path.abspath(output_file))
+    for candidate in candidates:
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def read_transcript_sidecar(path):
+    """Read the plain text of a transcript sidecar, one line per cue for SRT."""
+    with open(path, "r", encoding="utf-8-sig") as f:
+        content = f.read()
+    if not path.lower().endswith(".srt"):
+        return content.strip()
+
+    cues = []
+    for block in re.split(r"\n\s*\n", content.strip()):
+        lines = [line.strip() for line in block.splitlines()]
+        # Drop the cue number and the timing line; text lines may be numbers too
+        if lines and lines[0].isdigit():
+            lines = lines[1:]
+        if lines and "-->" in lines[0]:
+            lines = lines[1:]
+        text = [line for line in lines if line]
+        if text:
+            cues.append(" ".join(text))
+    return "\n".join(cues)
+
+
+def detect_language(model, audio):
+    """Detect the spoken language from the first 30 seconds of decoded audio."""
+    import whisper
+    mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), model.dims.n_mels).to(model.device)
+    _, probs = model.detect_language(mel)
+    return max(probs, key=probs.get)
+
+
+def tokens_to_segments(tokens, tokenizer, clip_duration):
+    """Split decoded tokens into segments at Whisper's timestamp tokens."""
+    segments = []
+    start = None
+    last_end = 0.0
+    text_tokens = []
+
+    def add_segment(begin, end):
+        text = tokenizer.decode(text_tokens)
+        if text.strip():
+            segments.append({"start": begin, "end": max(begin, end), "text": text, "tokens": list(text_tokens)})
+
+    for token in tokens:
+        if token < tokenizer.timestamp_begin:
+            text_tokens.append(token)
+            continue
+        timestamp = min((token - tokenizer.timestamp_begin) * TIMESTAMP_PRECISION, clip_duration)
+        if text_tokens:
+            # Closing timestamp of a segment
+            add_segment(last_end if start is None else start, timestamp)
+            last_end = timestamp
+            start = None
+            text_tokens = []
+        else:
+            start = timestamp
+    if text_tokens:
+        add_segment(last_end if start is None else start, clip_duration)
+    return segments
+
+
+def transcribe_clip_batch(model, audios, language=None):
+    """
+    Transcribe clips of at most 30 seconds in one batched encoder/decoder pass.
+    Returns a stable-ts result per clip, or None for clips whose greedy decode
+    looks unreliable and should be transcribed on their own. Segment timestamps
+    are snapped to silence like stable-ts does, but there are no word timestamps.
+    """
+    import torch
+    import whisper
+    import stable_whisper
+    from whisper.tokenizer import get_tokenizer
+
+    mel = torch.stack([
+        whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), model.dims.n_mels) for audio in audios
+    ]).to(model.device)
+    decode_options = whisper.DecodingOptions(task="transcribe", language=language, without_timestamps=False,
+                                             fp16=model.device.type != "cpu")
+    decoded = model.decode(mel, decode_options)
+
+    results = []
+    for audio, item in zip(audios, decoded):
+        if item.no_speech_prob > NO_SPEECH_THRESHOLD and item.avg_logprob < LOGPROB_THRESHOLD:
+            segments = []  # Silence
+        elif item.compression_ratio > COMPRESSION_RATIO_THRESHOLD or item.avg_logprob < LOGPROB_THRESHOLD:
+            results.append(None)
+            continue
+        else:
+            tokenizer = get_tokenizer(model.is_multilingual, num_languages=getattr(model, "num_languages", 99),
+                                      language=item.language, task="transcribe")
+            segments = tokens_to_segments(item.tokens, tokenizer, len(audio) / SAMPLE_RATE)
+        result = stable_whisper.WhisperResult(
+            {"text": item.text, "segments": segments, "language": item.language}, force_order=True)
+        # Same refinement as the normal path; regrouping needs word timestamps
+        result.adjust_by_silence(audio, verbose=None)
+        if result.has_words:
+            result.regroup()
+        results.append(result)
+    return results
+
+
+def load_worker_model(model_name, share_weights=False, quantize=False):
+    """Load a stable-ts model in a worker. Returns (model, shared)."""
+    if quantize:
+        import torch
+        if not torch.cuda.is_available():
+            # Dynamic int8 quantization creates private weights, so it replaces sharing
+            import stable_whisper
+            return stable_whisper.load_model(model_name, dq=True), False
+    if share_weights:
+        from shared_weights import load_model_shared
+        return load_model_shared(model_name)
+    import stable_whisper
+    return stable_whisper.load_model(model_name), False
+
+
+def release_model_memory():
+    """Return the memory of dropped models before another one is loaded."""
+    gc.collect()
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+def run_clip_batch(model, clips, language, output_format, worker_id, result_queue, load_audio=decode_audio):
+    """
+    Transcribe a batch of claimed short clips in a worker and save each output.
+    Returns the claimed entries that have to be transcribed individually instead.
+    """
+    batch = []
+    for file_info, future, duration in clips:
+        index, total_files, file_path, _ = file_info
+        result_queue.put(("file_started", (worker_id, index, duration)))
+        result_queue.put(("log", f"Processing {index + 1}/{total_files}: {os.path.basename(file_path)} (batched)"))
+        try:
+            batch.append(((file_info, future, duration), future.result() if future else load_audio(file_path)))
+        except Exception as e:
+            result_queue.put(("log", f"Error processing {os.path.basename(file_path)}: {str(e)}"))
+            result_queue.put(("file_failed", (worker_id, index, str(e))))
+    if not batch:
+        return []
+
+    try:
+        results = transcribe_clip_batch(model, [audio for _, audio in batch],
+                                        language if language and language != "Auto" else None)
+    except Exception as e:
+        if is_out_of_memory(e):
+            raise
+        result_queue.put(("log", f"Batched transcription failed ({str(e)}); transcribing clips individually."))
+        return [entry for entry, _ in batch]
+
+    fallback = []
+    for (entry, _), result in zip(batch, results):
+        file_info, _, duration = entry
+        index, _, file_path, _ = file_info
+        if result is None:
+            fallback.append(entry)
+            continue
+        result_queue.put(("file_progress", (worker_id, index, 1.0, duration)))
+        try:
+            output_file = f"{os.path.splitext(file_path)[0]}.{output_format}"
+            save_result(result, output_file, output_format)
+            result_queue.put(("log", f"Saved to {output_file}"))
+            result_queue.put(("file_done", (worker_id, index)))
+        except Exception as e:
+            result_queue.put(("log", f"Error processing {os.path.basename(file_path)}: {str(e)}"))
+            result_queue.put(("file_failed", (worker_id, index, str(e))))
+    return fallback
+
+
+class ResultChannel:
+    """
+    Write end of one worker's own result pipe, used like a queue. Sends are
+    synchronous, so a worker killed by the OOM killer cannot lose the messages
+    telling the manager which files it held, and no lock is shared with other
+    workers that a killed worker could leave held.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def put(self, message):
+        self.connection.send(message)
+
+
+def transcription_worker(file_queue, result_queue, model_name, language, output_format, worker_id=0, options=None):
     """
     Worker function that runs in a separate process.
     This allows us to terminate it forcefully if needed.
+    Up to `prefetch` queued files are claimed ahead and decoded in the background
+    while the current one is transcribed, unless they are too long to hold in memory. With `clip_batch`, up to that many short
+    clips are claimed and transcribed together in one batched pass.
     """
+    options = options or {}
+    prefetch = options.get("prefetch", 0)
+    stream_output = options.get("stream_output", False)
+    align_sidecars = options.get("align_sidecars", False)
+    transcribed_seconds = 0.0  # Audio transcribed so far and the time it took,
+    transcribe_time = 0.0      # to estimate the speedup of alignment
+    share_weights = options.get("share_weights", False)
+    quantize = options.get("quantize", False)
+    threads = options.get("threads")
+    clip_batch = options.get("clip_batch", 0)
+    batching = clip_batch > 1
+    cache_dir = options.get("audio_cache_dir")
+    load_audio = functools.partial(decode_audio, cache_dir=cache_dir,
+                                   cache_size_mb=options.get("audio_cache_mb", DEFAULT_CACHE_SIZE_MB))
     try:
-        import stable_whisper
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
         result_queue.put(("log", f"Loading model '{model_name}'..."))
-        model = stable_whisper.load_model(model_name)
-        result_queue.put(("log", "Model loaded."))
+        model, shared = load_worker_model(model_name, share_weights, quantize)
+        result_queue.put(("log", "Model loaded (shared weights)." if shared else "Model loaded."))
+        if share_weights:
+            result_queue.put(("weights_ready", worker_id))
+
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch > 0 else None
+        # Claimed jobs: (file_info, decoded audio future or None, duration if probed at claim time)
+        backlog = collections.deque()
+        unbatchable = set()  # Clips that fell back from a batch to a single transcription
+        stop_requested = False
+
+        def primary_model():
+            # The model is dropped while a fallback model transcribes a retry
+            nonlocal model
+            if model is None:
+                result_queue.put(("log", f"Reloading model '{model_name}'..."))
+                model, _ = load_worker_model(model_name, share_weights, quantize)
+            return model
+
+        def is_clip(duration):
+            return batching and duration is not None and duration <= SHORT_CLIP_SECONDS
+
+        def capacity():
+            # Only short clips are claimed beyond the prefetch window, to fill a batch
+            if batching and all(is_clip(entry[2]) for entry in backlog):
+                return max(1 + prefetch, clip_batch)
+            return 1 + prefetch
+
+        def start_decodes():
+            # Clips are small; other files are only decoded ahead within the prefetch window
+            # and when short enough, the current file is streamed from its path
+            for position, (file_info, future, duration) in enumerate(backlog):
+                fits = duration is not None and duration <= PREFETCH_MAX_SECONDS
+                if future is None and ((0 < position <= prefetch and fits) or is_clip(duration)):
+                    backlog[position] = (file_info, executor.submit(load_audio, file_info[2]), duration)
 
         while True:
-            try:
-                # Get next file from queue (non-blocking with timeout)
-                file_info = file_queue.get(timeout=0.5)
+            # Claim jobs until the current file plus the prefetch window are held
+            while not stop_requested and len(backlog) < capacity():
+                try:
+                    # Block while idle, wait briefly while a batch of clips is filling,
+                    # otherwise keep transcribing what we hold
+                    if not backlog:
+                        file_info = file_queue.get(timeout=0.5)
+                    elif capacity() > 1 + prefetch:
+                        file_info = file_queue.get(timeout=CLIP_BATCH_WAIT)
+                    else:
+                        file_info = file_queue.get_nowait()
+                except queue.Empty:
+                    break
                 if file_info is None:  # Poison pill to stop
+                    stop_requested = True
+                    result_queue.put(("stopping", worker_id))
+                    break
+                result_queue.put(("claimed", (worker_id, file_info[0])))
+                backlog.append((file_info, None, probe_duration(file_info[2]) if batching or prefetch else None))
+
+            if not backlog:
+                if stop_requested:
                     break
-                
-                index, total_files, file_path = file_info
-                filename = os.path.basename(file_path)
-                result_queue.put(("log", f"Processing {index + 1}/{total_files}: {filename}"))
-                
-                try:
-                    # Progress callback for real-time updates
-                    def progress_callback(seek, total_duration):
-                        if total_duration > 0:
-                            file_progress = seek / total_duration
-                            # Calculate overall progress: completed files + current file progress
-                            overall_progress = (index + file_progress) / total_files
-                            result_queue.put(("file_progress", (overall_progress, index + 1, total_files, file_progress * 100)))
-                    
-                    # Prepare arguments
-                    transcribe_args = {
-                        "audio": file_path,
-                        "progress_callback": progress_callback
-                    }
-                    if language and language != "Auto":
-                        transcribe_args["language"] = language
-                    
-                    # Run transcription
-                    result = model.transcribe(**transcribe_args)
-                    
-                    # Save output
-                    base_name = os.path.splitext(file_path)[0]
-                    output_file = f"{base_name}.{output_format}"
-                    
-                    if output_format == "vtt":
-                        result.to_srt_vtt(output_file, vtt=True)
-                    elif output_format == "srt":
-                        result.to_srt_vtt(output_file, vtt=False)
-                    elif output_format == "txt":
-                        result.to_txt(output_file)
-                    elif output_format == "json":
-                        result.save_as_json(output_file)
-                    
-                    result_queue.put(("log", f"Saved to {output_file}"))
-                    result_queue.put(("progress", (index + 1, total_files)))
-                    
-                except Exception as e:
-                    result_queue.put(("log", f"Error processing {filename}: {str(e)}"))
-            
-            except queue.Empty:
-                # No more files, check if we should continue waiting
                 continue
-        
-        result_queue.put(("done", None))
-        
+            if executor:
+                start_decodes()
+
+            if batching:
+                # Short clips without retries or sidecars go through one batched pass, shortest first
+                clips = [entry for entry in backlog
+                         if entry[2] is not None and entry[2] <= SHORT_CLIP_SECONDS
+                         and not entry[0][3] and entry[0][0] not in unbatchable
+                         and not (align_sidecars and find_transcript_sidecar(
+                             entry[0][2], f"{os.path.splitext(entry[0][2])[0]}.{output_format}"))]
+                if len(clips) > 1:
+                    clips = sorted(clips, key=lambda entry: entry[2])[:clip_batch]
+                    for entry in clips:
+                        backlog.remove(entry)
+                    try:
+                        fallback = run_clip_batch(primary_model(), clips, language, output_format, worker_id,
+                                                  result_queue, load_audio)
+                    except Exception as e:
+                        if not is_out_of_memory(e):
+                            raise
+                        result_queue.put(("memory_error", (worker_id, clips[0][0][0])))
+                        sys.exit(1)
+                    for entry in reversed(fallback):
+                        unbatchable.add(entry[0][0])
+                        backlog.appendleft(entry)
+                    continue
+
+            file_info, future, duration = backlog.popleft()
+            index, total_files, file_path, job_options = file_info
+            filename = os.path.basename(file_path)
+            # The duration lets the manager scale this file's watchdog timeout
+            if duration is None:
+                duration = probe_duration(file_path)
+            result_queue.put(("file_started", (worker_id, index, duration)))
+            result_queue.put(("log", f"Processing {index + 1}/{total_files}: {filename}"))
+
+            job_model = None
+            try:
+                # Retries may ask for a smaller model; it is only kept for this file
+                fallback_model = job_options.get("model", model_name)
+                if fallback_model != model_name:
+                    # Only one model is budgeted per worker: drop the primary one first, and
+                    # load the fallback privately rather than exporting shared weights for it
+                    model = None
+                    release_model_memory()
+                    result_queue.put(("log", f"Loading fallback model '{fallback_model}'..."))
+                    job_model, _ = load_worker_model(fallback_model, quantize=quantize)
+                else:
+                    job_model = primary_model()
+
+                # Progress callback for real-time updates
+                def progress_callback(seek, total_duration):
+                    if total_duration > 0:
+                        result_queue.put(("file_progress", (worker_id, index, seek / total_duration, total_duration)))
+
+                # Prepare arguments; cached audio is passed as a memory-mapped array
+                if future:
+                    audio = future.result()
+                else:
+                    audio = load_audio(file_path) if cache_dir else file_path
+                transcribe_args = {
+                    "audio": audio,
+                    "progress_callback": progress_callback
+                }
+                if language and language != "Auto":
+                    transcribe_args["language"] = language
+                if "word_timestamps" in job_options:
+                    transcribe_args["word_timestamps"] = job_options["word_timestamps"]
+
+                base_name = os.path.splitext(file_path)[0]
+                output_file = f"{base_name}.{output_format}"
+
+                # Alignment-only job: time an existing transcript instead of transcribing
+                result = None
+                sidecar = find_transcript_sidecar(file_path, output_file) if align_sidecars else None
+                # The sidecar is read before the output (possibly the same file) is written
+                replaces_sidecar = bool(sidecar) and os.path.abspath(sidecar) == os.path.abspath(output_file)
+                if sidecar:
+                    result_queue.put(("log", f"Aligning {filename} to {os.path.basename(sidecar)}"
+                                             + (" (the aligned output replaces it)" if replaces_sidecar else "")))
+                    start_time = time.time()
+                    audio = transcribe_args["audio"]
+                    if isinstance(audio, str):
+                        audio = load_audio(audio)
+                    try:
+                        align_language = transcribe_args.get("language") or detect_language(job_model, audio)
+                        result = job_model.align(audio, read_transcript_sidecar(sidecar), align_language,
+                                                 progress_callback=progress_callback,
+                                                 failure_threshold=ALIGN_FAILURE_THRESHOLD)
+                        failure = "too many words could not be aligned"
+                    except Exception as e:
+                        if is_out_of_memory(e):
+                            raise
+                        result, failure = None, str(e)
+                    elapsed = time.time() - start_time
+                    if result is None and replaces_sidecar:
+                        # A transcription would silently overwrite the user's transcript
+                        result_queue.put(("log", f"Alignment failed for {filename} ({failure}); skipped, "
+                                                 f"{os.path.basename(sidecar)} is left unchanged."))
+                        result_queue.put(("file_done", (worker_id, index)))
+                        continue
+                    if result is None:
+                        result_queue.put(("log", f"Alignment failed for {filename} ({failure}); transcribing instead."))
+                        transcribe_args["audio"] = audio
+                    else:
+                        audio_seconds = duration or len(audio) / SAMPLE_RATE
+                        if transcribed_seconds:
+                            rtf, source = transcribe_time / transcribed_seconds, "measured"
+                        else:
+                            rtf = TRANSCRIBE_RTF_ESTIMATE.get(model_name, max(TRANSCRIBE_RTF_ESTIMATE.values()))
+                            source = "estimated"
+                        full_time = rtf * audio_seconds
+                        result_queue.put(("log", f"Aligned in {elapsed:.1f}s vs ~{full_time:.1f}s to transcribe "
+                                                 f"({source}), {full_time / max(elapsed, 1e-3):.1f}x faster"))
+
+                # Run transcription
+                if result is None:
+                    start_time = time.time()
+                    if stream_output:
+                        # Finalized segments are printed in verbose mode; capture them into the sidecar
+                        stream = SegmentStreamWriter(partial_output_path(file_path, output_format))
+                        result_queue.put(("log", f"Streaming segments to {stream.path}"))
+                        with contextlib.redirect_stdout(stream):
+                            result = job_model.transcribe(verbose=True, **transcribe_args)
+                        stream.flush_cues()
+                    else:
+                        result = job_model.transcribe(**transcribe_args)
+                    if duration and job_model is model:
+                        transcribed_seconds += duration
+                        transcribe_time += time.time() - start_time
+
+                # Save output; this is the final pass with the fully refined timestamps
+                save_result(result, output_file, output_format)
+                if stream_output and os.path.exists(partial_output_path(file_path, output_format)):
+                    os.remove(partial_output_path(file_path, output_format))
+
+                result_queue.put(("log", f"Saved to {output_file}"))
+                result_queue.put(("file_done", (worker_id, index)))
+
+            except Exception as e:
+                if is_out_of_memory(e):
+                    # Exit so the memory is returned; the manager requeues with less parallelism
+                    result_queue.put(("memory_error", (worker_id, index)))
+                    sys.exit(1)
+                result_queue.put(("log", f"Error processing {filename}: {str(e)}"))
+                result_queue.put(("file_failed", (worker_id, index, str(e))))
+
+            finally:
+                if job_model is not model:
+                    job_model = None
+                    release_model_memory()
+
+        result_queue.put(("done", worker_id))
+
     except Exception as e:
-        result_queue.put(("error", f"Critical Error: {str(e)}"))
+        # E.g. not enough (GPU) memory for the model or no disk space for shared
+        # weights; the manager replaces this worker and retries with fewer workers
+        result_queue.put(("log", f"Worker {worker_id} failed: {str(e)}"))
+        sys.exit(1)
 
 
 class TranscriptionManager:
@@ -81,109 +818,528 @@ class TranscriptionManager:
         self.finish_callback = finish_callback
         self.file_progress_callback = file_progress_callback
         self.is_running = False
-        self.process = None
+        self.workers = {}  # worker_id -> Process
         self.file_queue = None
-        self.result_queue = None
+        self.channels = {}  # worker_id -> read end of the worker's result pipe
         self.poll_job = None
         self.app = None  # Will be set when start is called
+        self.warm_process = None
 
-    def start(self, files, model_name, language, output_format, app=None):
+    def start(self, files, model_name, language, output_format, app=None, options=None):
         if self.is_running:
             return
-        
+
+        options = options or {}
         self.is_running = True
         self.app = app
-        
-        # Create multiprocessing queues
+        self.model_name = model_name
+        self.language = language
+        self.output_format = output_format
+
+        # Jobs go through one shared queue; each worker reports back on its own pipe
         self.file_queue = multiprocessing.Queue()
-        self.result_queue = multiprocessing.Queue()
-        
-        # Add all files to the queue
-        total_files = len(files)
-        for index, file_path in enumerate(files):
-            self.file_queue.put((index, total_files, file_path))
-        
-        # Start the worker process
-        self.process = multiprocessing.Process(
-            target=transcription_worker,
-            args=(self.file_queue, self.result_queue, model_name, language, output_format)
-        )
-        self.process.daemon = True
-        self.process.start()
-        
+        self.channels = {}
+
+        # Files are fed to the shared queue gradually so they can be requeued
+        self.total_files = len(files)
+        self.files = list(files)
+        self.pending = collections.deque()
+        self.job_options = {}  # index -> fallback overrides for retries
+        self.attempts = {}
+        self.retry_at = {}
+        self.queued = 0  # Jobs in the shared queue not yet claimed by a worker
+        self.completed = 0
+        self.claimed = {}  # worker_id -> claimed job indexes
+        self.current = {}  # worker_id -> index being transcribed
+        self.started_at = {}  # worker_id -> time the current file started
+        self.durations = {}  # index -> media duration in seconds
+        self.timed_out = set()  # Workers killed by the watchdog
+        self.file_fraction = {}
+        self.memory_errors = set()
+        self.pills = 0  # Poison pills in the shared queue not yet taken
+        self.stopping = set()  # Workers that took a pill and finish their backlog
+        self.next_worker_id = 0
+        self.failed_starts = 0
+        self.peak_rss = {}  # Only for workers that have started transcribing
+        self.last_rss_sample = 0
+        self.memory_pressure = False
+
+        # With shared weights the first worker exports them; the rest wait and map them
+        self.share_weights = bool(options.get("share_weights", False))
+        self.weights_ready = not self.share_weights or os.path.exists(shared_weights_path(model_name))
+        self.stream_output = bool(options.get("stream_output", False))
+        self.align_sidecars = bool(options.get("align_sidecars", False))
+        self.clip_batch = max(0, int(options.get("clip_batch", 0)))
+        self.audio_cache_dir, self.audio_cache_mb = self._audio_cache_settings(options)
+
+        # Torch threads shared by all workers and int8 quantization, usually written by
+        # `install.py --calibrate`; an explicit per-worker "threads" setting takes precedence
+        self.threads = int(options["threads"]) if options.get("threads") else None
+        self.cpu_threads = int(options["cpu_threads"]) if options.get("cpu_threads") else None
+        self.quantize = bool(options.get("quantize", False))
+
+        # Watchdog and failure isolation
+        self.timeout_base = float(options.get("timeout_base", FILE_TIMEOUT_BASE))
+        self.timeout_factor = float(options.get("timeout_factor", FILE_TIMEOUT_FACTOR))
+        self.quarantine = load_quarantine(self.update_callback)
+        skip_quarantined = options.get("skip_quarantined", True)
+        for index, file_path in enumerate(self.files):
+            if skip_quarantined and quarantine_key(file_path) in self.quarantine:
+                self.update_callback(f"Skipping quarantined file {os.path.basename(file_path)}.")
+                self._finish_file(index)
+            else:
+                self.pending.append(self._job(index))
+
+        # Admission control: fit workers and prefetch into the memory budget
+        self.requested_workers = max(1, int(options.get("workers", 1)))
+        self.requested_prefetch = max(0, int(options.get("prefetch", 0)))
+        self.memory_budget_mb = options.get("memory_budget_mb")
+        if self.memory_budget_mb is None:
+            available = get_available_memory_mb()
+            if available is not None:
+                self.memory_budget_mb = available * DEFAULT_MEMORY_FRACTION
+
+        worker_mb, shared_mb = estimate_worker_memory_mb(model_name, self.share_weights)
+        self.max_workers, self.prefetch = plan_parallelism(
+            worker_mb, self.requested_workers, self.requested_prefetch, self.memory_budget_mb, shared_mb,
+            self.clip_batch)
+        self.max_workers = min(self.max_workers, max(1, len(self.pending)))
+        self._log_plan("Estimated")
+
+        self._scale_workers()
+
         # Start polling for results
         self._poll_results()
 
+    @staticmethod
+    def _audio_cache_settings(options):
+        """Return (cache dir or None when disabled, size cap in MB) from the settings."""
+        cache_dir = options.get("audio_cache_dir") or DEFAULT_CACHE_DIR
+        cache_mb = float(options.get("audio_cache_mb", DEFAULT_CACHE_SIZE_MB))
+        return (cache_dir if options.get("audio_cache", False) else None), cache_mb
+
+    def prewarm_cache(self, files, app=None, options=None):
+        """Decode a batch into the audio cache in a background process."""
+        if self.warm_process is not None and self.warm_process.is_alive():
+            self.update_callback("Cache pre-warm already running.")
+            return
+        options = options or {}
+        # Fill the directory transcription will use, even while the cache is still disabled
+        cache_dir = options.get("audio_cache_dir") or DEFAULT_CACHE_DIR
+        cache_mb = self._audio_cache_settings(options)[1]
+        self.warm_app = app
+        self.warm_queue = multiprocessing.SimpleQueue()
+        self.warm_process = multiprocessing.Process(
+            target=warm_cache, args=(list(files), cache_dir, cache_mb, self.warm_queue))
+        self.warm_process.daemon = True
+        self.warm_process.start()
+        self.update_callback(f"Pre-warming audio cache for {len(files)} file(s) in {cache_dir}...")
+        self._poll_prewarm()
+
+    def _poll_prewarm(self):
+        while not self.warm_queue.empty():
+            msg_type, msg_data = self.warm_queue.get()
+            if msg_type == "log":
+                self.update_callback(msg_data)
+            elif msg_type == "done":
+                self.update_callback(f"Audio cache ready ({msg_data} file(s)).")
+                self.warm_process = None
+                return
+        if not self.warm_process.is_alive():
+            self.update_callback("Cache pre-warm ended unexpectedly.")
+            self.warm_process = None
+            return
+        if self.warm_app:
+            self.warm_app.after(200, self._poll_prewarm)
+
+    def _log_plan(self, source):
+        if self.memory_budget_mb is None:
+            self.update_callback(f"Running {self.max_workers} worker(s), prefetch {self.prefetch} (memory budget unknown).")
+        else:
+            self.update_callback(f"{source} memory fit for {self.memory_budget_mb:.0f} MB budget: "
+                                 f"{self.max_workers} worker(s), prefetch {self.prefetch}.")
+
+    def _worker_threads(self):
+        """Torch threads for a new worker: the thread budget split over the planned pool."""
+        if self.threads or not self.cpu_threads:
+            return self.threads
+        return max(1, self.cpu_threads // max(1, min(self.max_workers, self._remaining())))
+
+    def _spawn_worker(self):
+        worker_id = self.next_worker_id
+        self.next_worker_id += 1
+        reader, writer = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(
+            target=transcription_worker,
+            args=(self.file_queue, ResultChannel(writer), self.model_name, self.language, self.output_format,
+                  worker_id, {"prefetch": self.prefetch, "share_weights": self.share_weights,
+                              "stream_output": self.stream_output, "align_sidecars": self.align_sidecars,
+                              "clip_batch": self.clip_batch, "audio_cache_dir": self.audio_cache_dir,
+                              "audio_cache_mb": self.audio_cache_mb, "threads": self._worker_threads(),
+                              "quantize": self.quantize})
+        )
+        process.daemon = True
+        process.start()
+        # Only the worker holds the write end, so the pipe reports EOF once it exits
+        writer.close()
+        self.workers[worker_id] = process
+        self.channels[worker_id] = reader
+        self.claimed[worker_id] = []
+
+    def _job(self, index):
+        return (index, self.total_files, self.files[index], self.job_options.get(index, {}))
+
+    def _remaining(self):
+        return self.total_files - self.completed
+
+    def _active_workers(self):
+        return len(self.workers) - len(self.stopping) - self.pills
+
+    def _retire_worker(self):
+        self.file_queue.put(None)
+        self.pills += 1
+
+    def _scale_workers(self):
+        """Start or retire workers so the pool matches the current admission limit."""
+        active = self._active_workers()
+        limit = min(self.max_workers, self._remaining())
+        if not self.weights_ready:
+            limit = min(limit, 1)
+        # Jobs already in the shared queue need a worker as much as pending ones
+        while active < limit and (self.pending or self.queued):
+            self._spawn_worker()
+            active += 1
+        while active > self.max_workers:
+            self._retire_worker()
+            active -= 1
+
+    def _dispatch(self):
+        """Top up the shared queue with jobs whose backoff has elapsed."""
+        now = time.time()
+        active = self._active_workers()
+        deferred = []
+        # Batching workers claim a whole batch of clips at once
+        window = active * max(1, self.clip_batch)
+        while self.pending and self.queued < window:
+            job = self.pending.popleft()
+            if self.retry_at.get(job[0], 0) > now:
+                deferred.append(job)
+                continue
+            self.file_queue.put(job)
+            self.queued += 1
+        self.pending.extendleft(reversed(deferred))
+
+    def _report_file_progress(self, index):
+        if not self.file_progress_callback:
+            return
+        overall = (self.completed + sum(self.file_fraction.values())) / self.total_files
+        percent = self.file_fraction.get(index, 0) * 100
+        self.file_progress_callback((overall, index + 1, self.total_files, percent))
+
+    def _finish_file(self, index):
+        self.completed += 1
+        self.file_fraction.pop(index, None)
+        self.finish_callback(self.completed, self.total_files)
+
+    def _handle_message(self, msg_type, msg_data):
+        """Process one worker message."""
+        if msg_type == "log":
+            self.update_callback(msg_data)
+        elif msg_type == "claimed":
+            worker_id, index = msg_data
+            self.queued -= 1
+            self.claimed.setdefault(worker_id, []).append(index)
+        elif msg_type == "weights_ready":
+            self.weights_ready = True
+        elif msg_type == "stopping":
+            self.pills -= 1
+            self.stopping.add(msg_data)
+        elif msg_type == "file_started":
+            worker_id, index, duration = msg_data
+            current = self.current.setdefault(worker_id, [])
+            if index not in current:
+                current.append(index)
+            self.started_at.setdefault(worker_id, time.time())
+            if duration:
+                self.durations[index] = duration
+            self.peak_rss.setdefault(worker_id, 0)
+            self.failed_starts = 0
+            self.file_fraction[index] = 0
+        elif msg_type == "file_progress":
+            # Real-time progress during file transcription
+            worker_id, index, fraction, total_duration = msg_data
+            self.file_fraction[index] = fraction
+            self.durations.setdefault(index, total_duration)
+            self._report_file_progress(index)
+        elif msg_type == "file_done":
+            worker_id, index = msg_data
+            self._release_file(worker_id, index)
+            self._release_quarantine(index)
+            self._finish_file(index)
+        elif msg_type == "file_failed":
+            worker_id, index, error = msg_data
+            self._release_file(worker_id, index)
+            self._retry_or_fail(index, error)
+        elif msg_type == "memory_error":
+            worker_id, index = msg_data
+            self.memory_errors.add(index)
+        elif msg_type == "done":
+            self.claimed.pop(msg_data, None)
+
+    def _drain_results(self):
+        """Handle all messages waiting on the workers' pipes."""
+        worker_ids = {channel: worker_id for worker_id, channel in self.channels.items()}
+        for channel in wait_connections(list(worker_ids), timeout=0):
+            try:
+                while channel.poll():
+                    msg_type, msg_data = channel.recv()
+                    self._handle_message(msg_type, msg_data)
+            except (EOFError, OSError):
+                # The worker exited (possibly mid-message); everything it sent has been read
+                channel.close()
+                del self.channels[worker_ids[channel]]
+
+    def _release_file(self, worker_id, index):
+        """Forget a worker's hold on a file it finished or gave up on."""
+        if index in self.claimed.get(worker_id, []):
+            self.claimed[worker_id].remove(index)
+        current = self.current.get(worker_id, [])
+        if index in current:
+            current.remove(index)
+        if not current:
+            # A batch is only finished once all of its clips are
+            self.current.pop(worker_id, None)
+            self.started_at.pop(worker_id, None)
+        self.file_fraction.pop(index, None)
+
+    def _release_quarantine(self, index):
+        """Forget quarantine entries of a file that has now been transcribed."""
+        path = os.path.abspath(self.files[index])
+        stale = [key for key in self.quarantine if key == path or key.rsplit("|", 2)[0] == path]
+        if stale:
+            for key in stale:
+                del self.quarantine[key]
+            save_quarantine(self.quarantine, self.update_callback)
+
+    def _retry_or_fail(self, index, reason, backoff=False, crashed=False):
+        """
+        Requeue a failed file with fallback options until retries are exhausted.
+        Only files that hung or crashed their worker are quarantined then; an
+        ordinary error is reported but not remembered, since it is often caused
+        by the environment (missing ffmpeg, full disk) rather than the file.
+        """
+        failures = self.attempts.get(index, 0) + 1
+        self.attempts[index] = failures
+        filename = os.path.basename(self.files[index])
+        if failures >= MAX_FILE_ATTEMPTS:
+            if crashed:
+                self.update_callback(f"Giving up on {filename} after {failures} attempts; quarantined.")
+                self.quarantine[quarantine_key(self.files[index])] = {"reason": reason, "attempts": failures}
+                save_quarantine(self.quarantine, self.update_callback)
+            else:
+                self.update_callback(f"Giving up on {filename} after {failures} attempts: {reason}")
+            self._finish_file(index)
+            return
+
+        self.job_options[index] = fallback_options(self.model_name, failures)
+        delay = REQUEUE_BACKOFF_SECONDS * 2 ** (failures - 1) if backoff else 0
+        if delay:
+            self.retry_at[index] = time.time() + delay
+        self.pending.appendleft(self._job(index))
+
+        changes = ", ".join(f"{key}={value}" for key, value in self.job_options[index].items())
+        message = f"Requeued {filename} (attempt {failures + 1}/{MAX_FILE_ATTEMPTS})"
+        if changes:
+            message += f" with {changes}"
+        if delay:
+            message += f" in {delay}s"
+        self.update_callback(message + ".")
+
+    def _file_timeout(self, indexes):
+        """Watchdog limit for the files a worker is processing together."""
+        durations = [self.durations.get(index) for index in indexes]
+        if None in durations:
+            return FILE_TIMEOUT_UNKNOWN
+        return self.timeout_base + self.timeout_factor * sum(durations)
+
+    def _check_timeouts(self):
+        """Kill workers whose current file exceeded its duration-scaled timeout."""
+        now = time.time()
+        for worker_id, indexes in list(self.current.items()):
+            started = self.started_at.get(worker_id)
+            process = self.workers.get(worker_id)
+            if not indexes or started is None or process is None or worker_id in self.timed_out:
+                continue
+            timeout = self._file_timeout(indexes)
+            if now - started > timeout:
+                filename = ", ".join(os.path.basename(self.files[index]) for index in indexes)
+                self.update_callback(f"{filename} exceeded its {timeout:.0f}s timeout; restarting worker {worker_id}.")
+                self.timed_out.add(worker_id)
+                process.kill()
+
+    def _handle_worker_exit(self, worker_id, process):
+        """Reconcile a worker that exited. Returns False when the batch cannot continue."""
+        del self.workers[worker_id]
+        channel = self.channels.pop(worker_id, None)
+        if channel is not None:
+            channel.close()
+        self.peak_rss.pop(worker_id, None)
+        self.started_at.pop(worker_id, None)
+        self.stopping.discard(worker_id)
+        claimed = self.claimed.pop(worker_id, None)
+        if claimed is None:
+            return True  # Finished normally after a poison pill
+
+        if not claimed:
+            # Died before taking any work, most likely while loading the model. The
+            # batch only ends once no worker is left to carry on.
+            self.failed_starts += 1
+            if self.failed_starts >= MAX_FILE_ATTEMPTS and not self.workers:
+                self.update_callback("Transcription process ended unexpectedly.")
+                self._cleanup()
+                return False
+            self.update_callback(f"Worker {worker_id} exited with code {process.exitcode} before starting; retrying.")
+            self._reduce_parallelism()
+            return True
+
+        self._requeue_lost_jobs(worker_id, process, claimed)
+        return True
+
+    def _reduce_parallelism(self):
+        """Retry with less memory pressure: one worker fewer and no decode prefetch."""
+        self.memory_pressure = True
+        plan = (self.max_workers, self.prefetch)
+        self.max_workers = max(1, min(self.max_workers - 1, self._active_workers()))
+        self.prefetch = 0
+        if (self.max_workers, self.prefetch) != plan:
+            self._log_plan("Reduced")
+
+    def _requeue_lost_jobs(self, worker_id, process, claimed):
+        """
+        Return the jobs held by a dead worker to the queue. Memory failures are
+        retried with backoff and reduced parallelism; watchdog kills are not.
+        """
+        current = self.current.pop(worker_id, [])
+
+        memory_failure = True
+        if worker_id in self.timed_out:
+            self.timed_out.discard(worker_id)
+            memory_failure = False
+            reason = "timed out"
+        elif process.exitcode is not None and process.exitcode < 0:
+            reason = f"killed by signal {-process.exitcode} (likely out of memory)"
+        elif any(index in self.memory_errors for index in current):
+            reason = "ran out of memory"
+        else:
+            reason = f"exited with code {process.exitcode}"
+        self.update_callback(f"Worker {worker_id} {reason}.")
+
+        for index in reversed(claimed):
+            self.file_fraction.pop(index, None)
+            if index not in current:
+                # Prefetched but never started: no penalty
+                self.pending.appendleft(self._job(index))
+                continue
+            self.memory_errors.discard(index)
+            self._retry_or_fail(index, reason, backoff=memory_failure, crashed=True)
+
+        if memory_failure:
+            self._reduce_parallelism()
+
+    def _sample_memory(self):
+        """Measure worker RSS and shrink the pool if the budget would be exceeded."""
+        now = time.time()
+        if now - self.last_rss_sample < RSS_SAMPLE_INTERVAL:
+            return
+        self.last_rss_sample = now
+
+        # Workers still loading the model would understate the real footprint
+        for worker_id in self.peak_rss:
+            rss = get_process_rss_mb(self.workers[worker_id].pid, proportional=self.share_weights)
+            if rss is not None:
+                self.peak_rss[worker_id] = max(rss, self.peak_rss[worker_id])
+        observed_mb = max(self.peak_rss.values(), default=0)
+        if not observed_mb or self.memory_budget_mb is None:
+            return
+
+        workers, prefetch = plan_parallelism(observed_mb, self.requested_workers, self.requested_prefetch,
+                                             self.memory_budget_mb, clip_batch=self.clip_batch)
+        # After a memory failure only ever shrink; otherwise measurements may also grow the pool
+        if workers < self.max_workers or (workers > self.max_workers and not self.memory_pressure):
+            self.max_workers = workers
+            self.prefetch = min(self.prefetch, prefetch) if self.memory_pressure else prefetch
+            self._log_plan("Measured")
+
     def _poll_results(self):
-        """Poll the result queue for updates from the worker process."""
+        """Poll the result pipes for updates from the worker processes."""
         try:
-            while True:
-                try:
-                    msg_type, msg_data = self.result_queue.get_nowait()
-                    
-                    if msg_type == "log":
-                        self.update_callback(msg_data)
-                    elif msg_type == "file_progress":
-                        # Real-time progress during file transcription
-                        if self.file_progress_callback:
-                            self.file_progress_callback(msg_data)
-                    elif msg_type == "progress":
-                        completed, total = msg_data
-                        self.finish_callback(completed, total)
-                    elif msg_type == "done":
-                        self.update_callback("All tasks finished.")
-                        self._cleanup()
-                        return
-                    elif msg_type == "error":
-                        self.update_callback(msg_data)
-                        self._cleanup()
+            self._drain_results()
+
+            dead = {wid: p for wid, p in self.workers.items() if not p.is_alive()}
+            if dead:
+                # Messages sent before exit are in the pipes by now; read them before reconciling
+                self._drain_results()
+                for worker_id, process in dead.items():
+                    if not self._handle_worker_exit(worker_id, process):
                         return
-                        
-                except queue.Empty:
-                    break
-            
-            # Check if process is still alive
-            if self.process and self.process.is_alive():
-                # Schedule next poll
-                if self.app:
-                    self.poll_job = self.app.after(100, self._poll_results)
-            else:
-                # Process died unexpectedly
-                if self.is_running:
-                    self.update_callback("Transcription process ended unexpectedly.")
+
+            if self._remaining() <= 0:
+                # Everything is processed: release the warm workers
+                for _ in range(self._active_workers()):
+                    self._retire_worker()
+                if not self.workers:
+                    self.update_callback("All tasks finished.")
                     self._cleanup()
-                    
+                    return
+            else:
+                self._check_timeouts()
+                self._sample_memory()
+                self._scale_workers()
+                self._dispatch()
+
+            # Schedule next poll
+            if self.app:
+                self.poll_job = self.app.after(100, self._poll_results)
+
         except Exception as e:
             self.update_callback(f"Polling error: {str(e)}")
             self._cleanup()
 
     def stop(self):
-        """Forcefully terminate the transcription process."""
-        if self.process and self.process.is_alive():
+        """Forcefully terminate the transcription processes."""
+        alive = [p for p in self.workers.values() if p.is_alive()]
+        if alive:
             self.update_callback("Forcefully stopping transcription...")
-            self.process.terminate()
-            self.process.join(timeout=2)
-            
-            # If still alive, kill it
-            if self.process.is_alive():
-                self.process.kill()
-                self.process.join(timeout=1)
-            
+            for process in alive:
+                process.terminate()
+            for process in alive:
+                process.join(timeout=2)
+
+                # If still alive, kill it
+                if process.is_alive():
+                    process.kill()
+                    process.join(timeout=1)
+
             self.update_callback("Transcription stopped.")
-        
+
         self._cleanup()
 
     def _cleanup(self):
         """Clean up resources."""
         self.is_running = False
-        
+
         if self.poll_job and self.app:
             try:
                 self.app.after_cancel(self.poll_job)
             except:
                 pass
             self.poll_job = None
-        
-        self.process = None
+
+        for process in self.workers.values():
+            if process.is_alive():
+                process.terminate()
+        self.workers = {}
+        for channel in self.channels.values():
+            channel.close()
+        self.channels = {}
         self.file_queue = None
-        self.result_queue = None